@@ -10,6 +10,10 @@
 """
 import pytest
 from tictactoe_library import TicTacToe, exceptions
+from tictactoe_library import analytics
+from tictactoe_library.analytics import (GameHistoryManager, _LOG_PATTERN,
+                                         _parse_line, _read_tail)
+from tictactoe_library.game import _close_history_file
 
 
 @pytest.fixture
@@ -17,12 +21,19 @@ def game():
     return TicTacToe(3)
 
 
+def place(game, symbol, cells):
+    """Ставит символ игрока в указанные клетки (row, col) через обычный ход."""
+    game.current_player = symbol
+    for r, c in cells:
+        game._try_make_move(r * game.board_size + c + 1)
+
+
 def test_initial_state(game):
     assert game._is_winner() is False
 
 
 def test_occupied_cell(game):
-    game.board[0][0] = 'X'
+    place(game, 'X', [(0, 0)])
     assert game._is_cell_occupied(0, 0)
     assert not game._is_cell_occupied(1, 1), \
         'Ошибка: пустая клетка считается занятой'
@@ -30,24 +41,28 @@ def test_occupied_cell(game):
 
 def test_horizontal_win(game):
     win_row = [(0, 0), (0, 1), (0, 2)]
-    for r, c in win_row:
-        game.board[r][c] = 'X'
+    place(game, 'X', win_row)
     assert game._is_winner(), \
         f'Ошибка: не распознана победа по горизонтали {win_row}'
 
 
 def test_diagonal_win(game):
     win_diagonal = [(0, 2), (1, 1), (2, 0)]
-    for r, c in win_diagonal:
-        game.board[r][c] = 'X'
+    place(game, 'X', win_diagonal)
     assert game._is_winner(), \
         f'Ошибка: не распознана выигрышная диагональ {win_diagonal}'
 
 
+def test_win_completed_in_middle(game):
+    place(game, 'X', [(0, 1), (2, 1), (1, 1)])
+    assert game._is_winner(), \
+        'Ошибка: не распознана победа, завершённая ходом в середину линии'
+    assert game.winning_coords == {(0, 1), (1, 1), (2, 1)}
+
+
 def test_garbage_coords(game):
     garbage_coords = [(0, 0), (0, 1), (1, 2)]
-    for r, c in garbage_coords:
-        game.board[r][c] = 'X'
+    place(game, 'X', garbage_coords)
     assert not game._is_winner(), \
         f'Ошибка: распознана победа с не выигрышной комбинацией {garbage_coords}'
 
@@ -58,11 +73,8 @@ def test_sum_win_coords(game):
 
 
 def test_draw_method(game):
-    game.board = [
-        ['X', 'O', 'X'],
-        ['X', 'O', 'O'],
-        ['O', 'X', 'X']
-    ]
+    place(game, 'O', [(0, 1), (1, 1), (1, 2), (2, 0)])
+    place(game, 'X', [(0, 0), (0, 2), (1, 0), (2, 1), (2, 2)])
     assert not game._is_winner(), \
         'Ошибка: на полностью заполненной доске найден победитель'
     assert game._is_draw(), \
@@ -74,20 +86,175 @@ def test_do_big_position(game):
         game._try_make_move(10)
 
 
+def test_non_numeric_position(game):
+    with pytest.raises(exceptions.InvalidInputError):
+        game._try_make_move('abc')
+
+
 def test_ai_winning_move(game):
-    game.board[0][0], game.board[0][1] = 'X', 'X'
-    game.board[1][0], game.board[1][1] = 'O', 'O'
+    place(game, 'X', [(0, 0), (0, 1)])
+    place(game, 'O', [(1, 0), (1, 1)])
     assert game._get_ai_move() == (1, 2), \
         'Бот не сделал решающий ход в последнюю клетку'
 
 
 def test_ai_center_priority(game):
-    game.board[0][0] = 'X'
+    place(game, 'X', [(0, 0)])
     assert game._get_ai_move() == (1, 1), 'Бот не занял центральную клетку'
 
 
 def test_ai_blocking_move(game):
-    game.board[0][0] = 'X'
-    game.board[0][1] = 'X'
+    place(game, 'X', [(0, 0), (0, 1)])
     assert game._get_ai_move() == (0, 2), \
         'Бот не заблокировал выигрышный ход игрока'
+
+
+def test_ai_search_winning_and_blocking_move_4x4():
+    game = TicTacToe(4)
+    place(game, 'X', [(0, 0), (0, 1), (0, 2)])
+    place(game, 'O', [(1, 0), (1, 1), (1, 2)])
+    assert game._get_ai_move() == (1, 3), \
+        'Бот на поле 4x4 не сделал решающий ход'
+
+    game = TicTacToe(4)
+    place(game, 'X', [(3, 0), (3, 1), (3, 2)])
+    place(game, 'O', [(0, 0)])
+    assert game._get_ai_move() == (3, 3), \
+        'Бот на поле 4x4 не заблокировал выигрышный ход игрока'
+
+
+def test_ai_never_loses_on_3x3():
+    def play_all(game):
+        # Перебираем все ответы игрока, бот отвечает своим ходом
+        for position in range(1, 10):
+            if game._is_cell_occupied(*divmod(position - 1, 3)):
+                continue
+            branch = TicTacToe(3)
+            branch.bits_x, branch.bits_o = game.bits_x, game.bits_o
+            branch.winner_count = game.winner_count
+            branch.current_player = 'X'
+            branch._try_make_move(position)
+            assert not branch._is_winner(), 'Бот проиграл на поле 3x3'
+            if branch._is_draw():
+                continue
+            branch.current_player = 'O'
+            row, col = branch._get_ai_move()
+            branch._try_make_move(row * 3 + col + 1)
+            if not (branch._is_winner() or branch._is_draw()):
+                play_all(branch)
+
+    play_all(TicTacToe(3))
+
+
+def test_self_play_bot_vs_bot_3x3_always_draws():
+    game = TicTacToe(3)
+    assert game.self_play(3) == {'X': 0, 'O': 0, 'draw': 3}
+    last_free = lambda g: ((~(g.bits_x | g.bits_o)) & g._full_mask).bit_length() - 1
+    results = game.self_play(2, policy_x=last_free)
+    assert results['X'] == 0 and sum(results.values()) == 2
+
+
+def test_read_tail_matches_full_read(tmp_path):
+    log = tmp_path / 'tic_tac_toe_history.txt'
+    # Кириллица дает многобайтовые символы, которые режутся границами блоков
+    entries = [f'[0{i % 9 + 1}.02.2026 13:5{i % 10}] Режим: Бот | Поле: 3x3 | '
+               f'Количество ходов: {i % 9 + 1} | Итог: {"Ничья" if i % 3 else "Победил X"}'
+               for i in range(12)]
+    log.write_text('\n'.join(entries[:5]) + '\n\n' + '\n'.join(entries[5:]) + '\n',
+                   encoding='UTF-8')
+    full = [line.strip() for line in log.read_text(encoding='UTF-8').splitlines()
+            if line.strip()]
+    for n in (1, 2, 5, 11, 12, 40):
+        assert _read_tail(log, n, block_size=7) == full[-n:], \
+            f'Хвост из {n} строк не совпал с полным чтением лога'
+
+
+def test_parse_line_regex_fallback():
+    # Двойные пробелы не проходят разбор по разделителям и разбираются _LOG_PATTERN
+    line = '[05.02.2026 13:54]  Режим: PVP |  Поле: 4x4 | Количество ходов: 7 | Итог:  Ничья'
+    assert _parse_line(line) == {'date': '05.02.2026 13:54', 'mode': 'PVP', 'size': 16,
+                                 'moves': 7, 'winner': None, 'draw': 'Ничья'}
+    assert _parse_line('не запись о матче') is None
+
+
+def test_parse_line_fast_path_agrees_with_regex():
+    def regex_parse(line):
+        if (m := _LOG_PATTERN.search(line)) is None:
+            return None
+        return {'date': m['date'], 'mode': m['mode'],
+                'size': int(m['rows']) * int(m['cols']), 'moves': int(m['moves']),
+                'winner': m['winner'], 'draw': m['draw']}
+
+    good = '[05.02.2026 13:54] Режим: Бот | Поле: 3x3 | Количество ходов: 6 | Итог: Победил O'
+    lines = [
+        good,
+        '[06.02.2026 12:31] Режим: PVP | Поле: 9x9 | Количество ходов: 81 | Итог: Ничья',
+        '[06.02.2026 12:31] Режим: PVP | Поле: 4x5 | Количество ходов: 0 | Итог: Победил X',
+        good.replace('ходов: 6', 'ходов: 06'),
+        good.replace('ходов: 6', 'ходов: -6'),
+        good.replace('ходов: 6', 'ходов: 1_0'),
+        good.replace('ходов: 6', 'ходов:  6'),
+        good.replace('Поле: 3x3', 'XXXXX 3x3').replace('Количество ходов: 6', 'Z' * 18 + '6'),
+        good.replace('Поле: 3x3', 'Поле: 3x'),
+        good.replace(' | Итог', ' | | Итог'),
+        good.replace('Победил O', 'Победил Y'),
+        good[1:],
+        '   ' + good,
+    ]
+    for line in lines:
+        assert _parse_line(line) == regex_parse(line), f'Разбор строки расходится с _LOG_PATTERN: {line}'
+    assert _parse_line(good)['moves'] == 6
+    assert _parse_line(good.replace('ходов: 6', 'ходов: -6')) is None
+
+
+def test_history_cache_invalidated_on_save_and_remove(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(analytics, '_history_cache', None)
+    # Файл истории открывается лениво по относительному пути, поэтому
+    # закрываем его, чтобы запись шла в лог временной директории
+    _close_history_file()
+    (tmp_path / 'tic_tac_toe_history.txt').write_text(
+        '[05.02.2026 13:54] Режим: Бот | Поле: 3x3 | Количество ходов: 6 | Итог: Победил O\n'
+        '[05.02.2026 13:55] Режим: PVP | Поле: 3x3 | Количество ходов: 9 | Итог: Ничья\n',
+        encoding='UTF-8')
+    game = TicTacToe(3)
+    game.is_play_bot = True
+    game.winner_count = 5
+    try:
+        GameHistoryManager().show_stats
+        assert 'Общее количество матчей 2' in capsys.readouterr().out
+
+        game._save_game_history('Победил X')
+        manager = GameHistoryManager()
+        manager.show_stats
+        out = capsys.readouterr().out
+        assert 'Общее количество матчей 3' in out, 'Кеш истории не сброшен после записи'
+        assert 'Количество побед X | Режим PVP 0 | Режим Бот 1 | Всего 1' in out
+
+        manager.remove_story('delete')
+        assert analytics._history_cache is None
+        assert not (tmp_path / 'tic_tac_toe_history.txt').exists()
+
+        game._save_game_history('Ничья')
+        GameHistoryManager().show_stats
+        assert 'Общее количество матчей 1' in capsys.readouterr().out
+    finally:
+        _close_history_file()
+
+
+def test_winrate_counts_draws(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(analytics, '_history_cache', None)
+    (tmp_path / 'tic_tac_toe_history.txt').write_text(
+        '[05.02.2026 13:54] Режим: Бот | Поле: 3x3 | Количество ходов: 5 | Итог: Победил X\n'
+        '[05.02.2026 13:55] Режим: Бот | Поле: 3x3 | Количество ходов: 6 | Итог: Победил O\n'
+        '[05.02.2026 13:56] Режим: Бот | Поле: 3x3 | Количество ходов: 9 | Итог: Ничья\n'
+        '[05.02.2026 13:57] Режим: Бот | Поле: 3x3 | Количество ходов: 9 | Итог: Ничья\n',
+        encoding='UTF-8')
+    manager = GameHistoryManager()
+    manager.winrate('bot')
+    assert capsys.readouterr().out == (
+        'Процент побед | mode: Bot | Игрок(X) 25.0% | Бот(O) 25.0% | Ничья: 50.0%\n'), \
+        'Ничьи не учтены в винрейте'
+    manager.winrate('pvp')
+    assert capsys.readouterr().out == 'Статистика для режима PVP пока отсутствует.\n'
@@ -1,6 +1,99 @@
-from os import path, remove
+from collections import Counter, defaultdict
+from itertools import chain, islice
+from os import path, remove, stat
 import re
+import sys
 from .exceptions import InvalidConfigurationError
+from .game import _close_history_file
+
+# Шаблон строки лога компилируется один раз при импорте модуля,
+# а не при создании каждого GameHistoryManager
+_LOG_PATTERN = re.compile(r'''
+\[(?P<date>.*?)\]
+\s+Режим: \s+(?P<mode>Бот|PVP)\s+ \|
+\s+ Поле: \s+ (?P<rows>\d+)x(?P<cols>\d+)
+\s+ \| \s+ Количество\s+ходов:\s+ (?P<moves>\d+)
+\s+ \| \s+ Итог: \s+ (Победил\s+ (?P<winner>[XO])|(?P<draw>Ничья))
+''', re.VERBOSE)
+
+
+# Поля строки лога целиком -> значение. Ключи — точный текст поля, поэтому
+# поиск по словарю одновременно проверяет формат поля и дает его значение.
+# Размеры поля и число ходов покрывают все партии, возможные в TicTacToe
+# (поле от 2x2 до 9x9); прочие значения разбирает _LOG_PATTERN
+_LOG_MODES = {'Режим: Бот': 'Бот', 'Режим: PVP': 'PVP'}
+_LOG_SIZES = {f'Поле: {n}x{n}': n * n for n in range(2, 10)}
+_LOG_MOVES = {f'Количество ходов: {k}': k for k in range(1, 82)}
+_LOG_RESULTS = {'Итог: Победил X': ('X', None), 'Итог: Победил O': ('O', None),
+                'Итог: Ничья': (None, 'Ничья')}
+
+
+def _parse_line(line):
+    """
+    Разбор одной строки лога в словарь (date, mode, size, moves, winner, draw).
+
+    Формат строки фиксирован, поэтому она режется по разделителям '] ' и ' | ',
+    а каждое поле целиком ищется в словарях _LOG_MODES, _LOG_SIZES, _LOG_MOVES
+    и _LOG_RESULTS. Строки, не совпадающие с форматом в точности,
+    разбираются через _LOG_PATTERN. Возвращает None, если это не запись о матче.
+    """
+    if line.startswith('['):
+        try:
+            date, rest = line[1:].split('] ', 1)
+            mode, size, moves, result = rest.split(' | ')
+            winner, draw = _LOG_RESULTS[result]
+            return {'date': date, 'mode': _LOG_MODES[mode], 'size': _LOG_SIZES[size],
+                    'moves': _LOG_MOVES[moves], 'winner': winner, 'draw': draw}
+        except (ValueError, KeyError):
+            pass
+    if (m := _LOG_PATTERN.search(line)) is None:
+        return None
+    return {'date': m['date'], 'mode': m['mode'],
+            'size': int(m['rows']) * int(m['cols']), 'moves': int(m['moves']),
+            'winner': m['winner'], 'draw': m['draw']}
+
+
+def _write_lines(header, lines):
+    """Вывод заголовка и строк истории одним вызовом sys.stdout.writelines."""
+    sys.stdout.writelines(f'{line}\n' for line in chain((header,), lines))
+
+
+def _read_tail(file_name, n_lines, block_size=4096):
+    """
+    Чтение последних n_lines непустых строк файла без чтения файла целиком.
+    Файл читается блоками по block_size байт с конца, пока не наберется
+    нужное число полных строк или не будет достигнуто начало файла.
+    """
+    with open(file_name, 'rb') as f:
+        pos = f.seek(0, 2)
+        blocks = []
+        lines = []
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            blocks.append(f.read(step))
+            raw_lines = b''.join(reversed(blocks)).split(b'\n')
+            # Первая строка блока может быть обрезана, пока не достигнуто начало файла
+            if pos > 0:
+                raw_lines = raw_lines[1:]
+            lines = [line for raw in raw_lines
+                     if (line := raw.decode('UTF-8').strip())]
+            if len(lines) >= n_lines:
+                break
+    return lines[-n_lines:]
+
+
+# Режимы винрейта: аргумент пользователя -> (режим в логе, шаблон вывода)
+_WINRATE_MODES = {
+    'bot': ('Бот', 'Процент побед | mode: Bot | Игрок(X) {} | Бот(O) {} | Ничья: {}'),
+    'pvp': ('PVP', 'Процент побед | mode: PVP | Игрок(X) {} | Игрок(O) {} | Ничья {}'),
+}
+
+# Разобранная история последнего прочитанного файла. Ключ — абсолютный путь,
+# время изменения и размер файла: пока они не менялись, повторный
+# GameHistoryManager переиспользует строки и данные без чтения файла
+_history_cache = None
 
 
 class GameHistoryManager:
@@ -11,76 +104,127 @@ class GameHistoryManager:
     """
 
     def __init__(self):
-        """Инициализация менеджера: проверка файла, чтение строк и парсинг данных."""
+        """
+        Инициализация менеджера: проверка наличия файла.
+        Сам лог читается и разбирается лениво, при первом обращении
+        к self.lines или self.parsed_data.
+        """
         self.log_name = 'tic_tac_toe_history.txt'
         if not path.isfile('tic_tac_toe_history.txt'):
             raise InvalidConfigurationError(
                 f'Файл {self.log_name} не найден. Сыграйте хотя бы раз!'
             )
+        self._lines = None
+        self._parsed_data = None
+
+    @property
+    def lines(self):
+        """Все непустые строки лога."""
+        if self._lines is None:
+            self._load()
+        return self._lines
+
+    @property
+    def parsed_data(self):
+        """Записи о матчах, разобранные _parse_line."""
+        if self._parsed_data is None:
+            self._load()
+        return self._parsed_data
+
+    def _load(self):
+        """
+        Чтение и парсинг текстового лога за один проход по файлу.
+        Каждая строка сразу разбирается _parse_line в словарь Python
+        с полями date, mode, size, moves, winner и draw.
+        В том же проходе считаются агрегаты для статистики: сумма ходов,
+        суммарная площадь полей, самый быстрый матч, счетчик итогов,
+        строки матчей, закончившихся ничьей, и индекс записей по дате.
+        Результат кешируется на уровне модуля до изменения файла.
+        """
+        global _history_cache
         try:
+            file_stat = stat(self.log_name)
+            cache_key = (path.abspath(self.log_name),
+                         file_stat.st_mtime_ns, file_stat.st_size)
+            if _history_cache is not None and _history_cache[0] == cache_key:
+                self._set_state(_history_cache[1])
+                return
+            lines = []
+            parsed_data = []
+            total_moves = total_area = 0
+            fastest = None
+            result_counts = Counter()
+            draw_lines = []
+            by_date = defaultdict(list)
             with open(self.log_name, 'r', encoding='UTF-8') as f:
-                self.lines = [line.strip() for line in f if line.strip()]
+                for raw_line in f:
+                    line = raw_line.strip()
+                    if not line:
+                        continue
+                    lines.append(line)
+                    if entry := _parse_line(line):
+                        parsed_data.append(entry)
+                        total_moves += entry['moves']
+                        total_area += entry['size']
+                        if fastest is None or entry['moves'] < fastest['moves']:
+                            fastest = entry
+                        result_counts[entry['mode'], entry['winner'] or 'draw'] += 1
+                        if entry['draw']:
+                            draw_lines.append(line)
+                        by_date[entry['date'][:10]].append(entry)
         except OSError as e:
             raise InvalidConfigurationError(
                 f'Ошибка доступа к файлу: {e}') from e
-        """
-        Парсинг текстового лога с помощью регулярных выражений.
-        Использует именованные группы (date, mode, size и т.д.) для
-        преобразования строк файла в структурированные словари Python.
-        """
-        pattern = re.compile(r'''
-        \[(?P<date>.*?)\]
-        \s+Режим: \s+(?P<mode>Бот|PVP)\s+ \|
-        \s+ Поле: \s+ (?P<size>\d+x\d+)
-        \s+ \| \s+ Количество\s+ходов:\s+ (?P<moves>\d+)
-        \s+ \| \s+ Итог: \s+ (Победил\s+ (?P<winner>[XO])|(?P<draw>Ничья))
-        ''', re.VERBOSE)
-        data = [m.groupdict()
-                for line in self.lines if (m := pattern.search(line))]
-        for entry in data:
-            entry['size'] = int(entry['size'][0]) * int(entry['size'][2])
-            entry['moves'] = int(entry['moves'])
-        self.parsed_data = data
+        state = (lines, parsed_data, total_moves, total_area, fastest,
+                 result_counts, draw_lines, by_date)
+        self._set_state(state)
+        _history_cache = (cache_key, state)
+
+    def _set_state(self, state):
+        """Сохраняет строки, записи и агрегаты истории в атрибутах менеджера."""
+        (self._lines, self._parsed_data, self._total_moves, self._total_area,
+         self._fastest, self._result_counts, self._draw_lines, self._by_date) = state
 
     @property
     def show_match_story(self):
         """Выводит полную историю матчей в консоль."""
-        print('--- История игр ---')
-        for one_party in self.lines:
-            print(one_party)
+        _write_lines('--- История игр ---', self.lines)
 
     @property
     def show_draws(self):
         """Отображение только тех игр, которые закончились ничьей."""
-        print('--- История игр в ничью ---')
-        for one_party in self.lines:
-            if 'Ничья' in one_party:
-                print(one_party)
+        self._ensure_loaded()
+        _write_lines('--- История игр в ничью ---', self._draw_lines)
 
     def remove_story(self, confirm=False):
-        """Безопасное удаление файла истории с запросом подтверждения у пользователя."""
+        """
+        Безопасное удаление файла истории с запросом подтверждения у пользователя.
+        Сам лог при этом не читается; кеш разобранной истории сбрасывается.
+        """
+        global _history_cache
         if confirm is False or confirm != 'delete':
             print('Если вы уверены что хотите удалить файл с логами, '
                   'введите "delete"')
         elif confirm == 'delete':
+            _close_history_file()
+            _history_cache = None
             remove('tic_tac_toe_history.txt')
             print('Файл с историей игр успешно удалён')
 
-    def _count_results(self, mode, winner, key='winner'):
-        """Вспомогательный метод для подсчета количества матчей по заданным критериям."""
-        return sum(1 for line in self.parsed_data
-                   if line['mode'] == mode and line[key] == winner)
+    def _ensure_loaded(self):
+        """Загружает историю при первом обращении к агрегатам."""
+        if self._parsed_data is None:
+            self._load()
 
     @property
     def show_stats(self):
         """Краткая сводка: статистика побед и ничьих с разделением по режимам."""
-        win_x_pvp = self._count_results('PVP', 'X')
-        win_x_bot = self._count_results('Бот', 'X')
-        win_o_pvp = self._count_results('PVP', 'O')
-        win_o_bot = self._count_results('Бот', 'O')
-
-        draws_pvp = self._count_results('PVP', 'Ничья', 'draw')
-        draws_bot = self._count_results('Бот', 'Ничья', 'draw')
+        self._ensure_loaded()
+        counts = self._result_counts
+        win_x_pvp, win_o_pvp, draws_pvp = (
+            counts['PVP', 'X'], counts['PVP', 'O'], counts['PVP', 'draw'])
+        win_x_bot, win_o_bot, draws_bot = (
+            counts['Бот', 'X'], counts['Бот', 'O'], counts['Бот', 'draw'])
 
         total_x_win = win_x_pvp + win_x_bot
         total_o_win = win_o_pvp + win_o_bot
@@ -100,10 +244,9 @@ class GameHistoryManager:
             print('Укажите игрока [X / O]')
             return
 
-        print(f'--- Победы игрока {char} ---')
-        for one_party in self.lines:
-            if one_party.endswith(char.upper()):
-                print(one_party)
+        symbol = char.upper()
+        _write_lines(f'--- Победы игрока {char} ---',
+                     (one_party for one_party in self.lines if one_party.endswith(symbol)))
 
     def last_matches(self, n = None):
         """Отображение последних N сыгранных матчей."""
@@ -114,47 +257,54 @@ class GameHistoryManager:
             print('Введите диапазон игр от 1 до 40 включительно')
             return
 
-        sum_of_games = min(n, len(self.lines))
+        # Если лог еще не загружен целиком, читаем только его хвост
+        if self._lines is not None:
+            lines = self._lines
+        else:
+            try:
+                lines = _read_tail(self.log_name, n)
+            except OSError as e:
+                raise InvalidConfigurationError(
+                    f'Ошибка доступа к файлу: {e}') from e
+        sum_of_games = min(n, len(lines))
         if sum_of_games == 0:
             print('История игр пока пуста.')
             return
 
         last_word = 'игры' if sum_of_games < 5 else 'игр'
-        # Срез для получения последних игр
-        last_games = self.lines[-1:-sum_of_games - 1: -1]
-        (print(f'--- Последние {sum_of_games} {last_word} ---') if sum_of_games > 1
-         else print('--- Последняя игра ---'))
-        for one_party in last_games:
-            print(one_party)
+        # Последние игры в обратном порядке, без копирования среза
+        last_games = islice(reversed(lines), sum_of_games)
+        _write_lines(f'--- Последние {sum_of_games} {last_word} ---' if sum_of_games > 1
+                     else '--- Последняя игра ---', last_games)
 
     @property
     def sum_moves(self):
         """Подсчет общего количества совершенных ходов за всю историю игр."""
-        print(
-            f'Общее кол-во ходов: {sum(line["moves"] for line in self.parsed_data)}')
+        self._ensure_loaded()
+        print(f'Общее кол-во ходов: {self._total_moves}')
 
     @property
     def sum_boards(self):
         """Подсчет суммарной площади всех игровых полей."""
-        print(
-            f'Общая площадь всех полей: {sum(line["size"] for line in self.parsed_data)}')
+        self._ensure_loaded()
+        print(f'Общая площадь всех полей: {self._total_area}')
 
     def winrate(self, target=None):
         """
         Расчет винрейта (процентного соотношения побед и ничьих)
         для конкретного режима игры ('pvp' или 'бот').
         """
-        if target is None or target.lower() not in ['bot', 'pvp']:
+        mode = _WINRATE_MODES.get(target.lower()) if isinstance(target, str) else None
+        if mode is None:
             print('Укажите режим игры: [bot / pvp]')
             return
-        target = target.lower()
+        mode_name, template = mode
         def chance_calc_f(a, c): return f'{(100 / a * c):.1f}%'
 
-        mode_name = 'Бот' if target == 'bot' else 'PVP'
-
-        win_x = self._count_results(mode_name, 'X')
-        win_o = self._count_results(mode_name, 'O')
-        draws = self._count_results(mode_name, 'Ничья')
+        self._ensure_loaded()
+        counts = self._result_counts
+        win_x, win_o, draws = (counts[mode_name, 'X'], counts[mode_name, 'O'],
+                               counts[mode_name, 'draw'])
         total_games = win_x + win_o + draws
         if total_games == 0:
             return print(
@@ -163,15 +313,16 @@ class GameHistoryManager:
         win_x = chance_calc_f(total_games, win_x)
         win_o = chance_calc_f(total_games, win_o)
         draws = chance_calc_f(total_games, draws)
-        print((f'Процент побед | mode: Bot | Игрок(X) {win_x} | Бот(O) {win_o} | Ничья: {draws}')
-              if target == 'bot'
-              else f'Процент побед | mode: PVP | Игрок(X) {win_x} |'
-              f' Игрок(O) {win_o} | Ничья {draws}')
+        print(template.format(win_x, win_o, draws))
 
     @property
     def fastest_game(self):
         """Поиск и вывод информации о матче с минимальным количеством ходов."""
-        record = min(self.parsed_data, key=lambda x: x['moves'])
+        self._ensure_loaded()
+        record = self._fastest
+        if record is None:
+            print('История игр пока пуста.')
+            return
         print(
             f'Наименьшее кол-во ходов. Дата: {record["date"]}. Всего {record["moves"]} ходов')
 
@@ -180,16 +331,20 @@ class GameHistoryManager:
         if target is None:
             print('Укажите дату в формате ДД.ММ.ГГГГ')
             return
-        result = [
-            line for line in self.parsed_data if line['date'].startswith(target)]
+        self._ensure_loaded()
+        # Полная дата ищется по индексу, неполная — перебором по префиксу
+        if len(target) == 10:
+            result = self._by_date.get(target, ())
+        else:
+            result = [line for line in self.parsed_data
+                      if line['date'].startswith(target)]
 
         if not result:
             print(f'За дату {target} игр не найдено.')
         else:
-            print(f'{"-" * 10} Все игры за дату {target} {"-" * 10}')
-            for res in result:
-                outcome = f"Победил {
-                    res['winner']}" if res['winner'] else "Ничья"
-
-                print(f"[{res['date']}] Режим: {res['mode']} | "
-                      f"Поле: {res['size']} | Ходов: {res['moves']} | Итог: {outcome}")
+            _write_lines(
+                f'{"-" * 10} Все игры за дату {target} {"-" * 10}',
+                (f"[{res['date']}] Режим: {res['mode']} | Поле: {res['size']} | "
+                 f"Ходов: {res['moves']} | "
+                 f"Итог: {f'Победил {res['winner']}' if res['winner'] else 'Ничья'}"
+                 for res in result))
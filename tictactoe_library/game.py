@@ -5,11 +5,117 @@
 системой ведения логов, расширенной аналитикой сыгранных матчей
 и адаптивным ботом (ИИ).
 """
+import atexit
+import sys
 from datetime import datetime
-from random import choice
-from colorama import Fore, Style
+from functools import lru_cache
+from colorama import Fore, Style, just_fix_windows_console
 from .exceptions import *
 
+# Включение ANSI-цветов в консоли Windows; на остальных системах ничего не делает.
+# В отличие от colorama.init(), stdout не оборачивается, и запись кадра не
+# проходит через дополнительный разбор escape-последовательностей
+just_fix_windows_console()
+
+# Файл истории открывается один раз и переиспользуется между партиями
+_history_fh = None
+
+
+def _get_history_file():
+    """Возвращает открытый на дозапись (построчно буферизованный) файл истории."""
+    global _history_fh
+    if _history_fh is None:
+        _history_fh = open('tic_tac_toe_history.txt', 'a',
+                           encoding='utf-8', buffering=1)
+    return _history_fh
+
+
+def _close_history_file():
+    """Закрывает файл истории; следующая запись откроет его заново."""
+    global _history_fh
+    if _history_fh is not None:
+        _history_fh.close()
+        _history_fh = None
+
+
+atexit.register(_close_history_file)
+
+
+# Поиск хода бота на полях больше 3x3: оценка победы, флаги записей
+# таблицы транспозиций и бюджет листьев, по которому выбирается глубина
+_WIN_SCORE = 1_000_000
+_TT_EXACT, _TT_LOWER, _TT_UPPER = 0, 1, 2
+_SEARCH_BUDGET = 20_000
+
+
+@lru_cache(maxsize=None)
+def _line_tables(board_size):
+    """
+    Динамическая генерация выигрышных линий для поля board_size x board_size.
+    Проходит по горизонталям, вертикалям и двум главным диагоналям.
+    Результат кешируется по размеру поля, поэтому новая партия (в том числе
+    повторная игра) не строит таблицы заново. Все таблицы неизменяемые:
+    - line_coords: линии в виде координат (row, col) для подсветки победы;
+    - line_masks: битовые маски линий;
+    - lines_through: для каждой клетки пары (маска, frozenset координат)
+      линий, проходящих через неё;
+    - lines_through_masks: для каждой клетки только маски этих линий.
+    """
+    n = board_size
+    line_coords = []
+    for i in range(n):
+        # Горизонтальная траектория i
+        line_coords.append(tuple((i, j) for j in range(n)))
+        # Вертикальная траектория i
+        line_coords.append(tuple((j, i) for j in range(n)))
+    # Диагонали
+    line_coords.append(tuple((i, i) for i in range(n)))
+    line_coords.append(tuple((i, n - 1 - i) for i in range(n)))
+    line_flat_idx = tuple(tuple(r * n + c for r, c in combo) for combo in line_coords)
+    line_masks = tuple(sum(1 << idx for idx in line) for line in line_flat_idx)
+    lines_through = [[] for _ in range(n * n)]
+    for mask, line, coords in zip(line_masks, line_flat_idx, line_coords):
+        coords_set = frozenset(coords)
+        for idx in line:
+            lines_through[idx].append((mask, coords_set))
+    lines_through = tuple(tuple(lines) for lines in lines_through)
+    lines_through_masks = tuple(tuple(mask for mask, _ in lines) for lines in lines_through)
+    return tuple(line_coords), line_masks, lines_through, lines_through_masks
+
+
+# Маски выигрышных линий поля 3x3 — самого частого размера — готовы при импорте
+_LINE_MASKS_3X3 = _line_tables(3)[1]
+_FULL_MASK_3X3 = 0b111111111
+
+
+@lru_cache(maxsize=None)
+def _solve_3x3(bits_own, bits_opp):
+    """
+    Полный перебор (минимакс в форме негамакса) для поля 3x3.
+
+    bits_own — битборд стороны, которая ходит, bits_opp — соперника.
+    Возвращает пару (оценка, индекс лучшей клетки). Победа оценивается
+    тем выше, чем раньше она достигается, поражение — тем выше, чем позже.
+    Кеш функции играет роль таблицы ходов: дерево 3x3 содержит лишь несколько
+    тысяч позиций, поэтому после первых ходов ответ бота — поиск в словаре.
+    """
+    occupied = bits_own | bits_opp
+    empty_count = 9 - occupied.bit_count()
+    for mask in _LINE_MASKS_3X3:
+        if bits_opp & mask == mask:
+            return -(empty_count + 1), None
+    if not empty_count:
+        return 0, None
+    best_score, best_idx = None, None
+    empty = ~occupied & _FULL_MASK_3X3
+    while empty:
+        bit = empty & -empty
+        empty ^= bit
+        score = -_solve_3x3(bits_opp, bits_own | bit)[0]
+        if best_score is None or score > best_score:
+            best_score, best_idx = score, bit.bit_length() - 1
+    return best_score, best_idx
+
 
 class TicTacToe:
     """
@@ -33,58 +139,70 @@ class TicTacToe:
 
         self.board_size = board_size
         self.board_limit = board_size * board_size
-        self.board = [[' ' for _ in range(self.board_size)]
-                      for _ in range(self.board_size)]
-
-        self.reset_player = False
+        self._full_mask = (1 << self.board_limit) - 1
+        self._min_win_moves = 2 * board_size - 1
         self.mode = mode
-        self.win_combinations = self._generate_win_combinations()
-        self.winning_coords = []
-        self.current_player = 'X'
-        self.change_bot_play = 'player'
-        self.is_play_bot = None if mode is None else mode
-        self.winner_count = 0
-        self.position = None
+        # Таблицы выигрышных линий строятся один раз на размер поля
+        (self.line_coords, self.line_masks,
+         self.lines_through, self._lines_through_masks) = _line_tables(board_size)
+        self.win_combinations = self.line_coords
+        # Готовые отрисовки ячеек, чтобы не форматировать строки на каждом кадре
+        self._cell_x = f'{Fore.RED}{"X":^{self.CELL_WIDTH}}{Style.RESET_ALL}'
+        self._cell_o = f'{Fore.GREEN}{"O":^{self.CELL_WIDTH}}{Style.RESET_ALL}'
+        self._cell_dim_x = f'{Fore.LIGHTBLACK_EX}{"X":^{self.CELL_WIDTH}}{Style.RESET_ALL}'
+        self._cell_dim_o = f'{Fore.LIGHTBLACK_EX}{"O":^{self.CELL_WIDTH}}{Style.RESET_ALL}'
+        self._cell_empty = f"{' ':^{self.CELL_WIDTH}}"
+        self._player_label = {'X': f'{Fore.RED}X{Style.RESET_ALL}',
+                              'O': f'{Fore.GREEN}O{Style.RESET_ALL}'}
+        # Неизменная в течение игры часть строки лога
+        self._log_board = f'Поле: {board_size}x{board_size} | Количество ходов: '
+        # Пустая линия для высоты ячейки и гибридный разделитель с нижним
+        # подчеркиванием зависят только от размера поля
+        self._empty_line = '|'.join([' ' * self.CELL_WIDTH] * self.board_size)
+        self._hybrid_sep = '|'.join(['_' * self.CELL_WIDTH] * self.board_size)
+        self.reset()
 
     def __str__(self):
         """Возвращает краткое состояние текущей игровой сессии."""
         return f'Игра TicTacToe [Поле: {self.board_size}x{self.board_size}]'
 
-    def _generate_win_combinations(self):
-        """
-        Динамическая генерация выигрышных линий.
-        Проходит по горизонталям, вертикалям и двум главным диагоналям,
-        сохраняя координаты кортежами (row, col).
-        """
-        win_combinations = []
-        for i in range(self.board_size):
-            # Горизонтальная траектория i
-            win_combinations.append([(i, j) for j in range(self.board_size)])
-            # Вертикальная траектория i
-            win_combinations.append([(j, i) for j in range(self.board_size)])
-        # Диагонали
-        win_combinations.append([(i, i) for i in range(self.board_size)])
-        win_combinations.append([(i, self.board_size - 1 - i)
-                                for i in range(self.board_size)])
-        return win_combinations
-
     def reset(self):
         """
         Сброс всех игровых параметров к начальному состоянию.
         Вызывается в __init__ для первичной настройки переменных при создании объекта,
         а также после завершения партии, если игроки решили сыграть снова.
+        Неизменные параметры поля (таблицы линий, отрисовки) не пересчитываются.
         """
-        self.reset_player = False
         self.current_player = 'X'
-        self.board = [[' ' for _ in range(self.board_size)]
-                      for _ in range(self.board_size)]
-        self.winning_coords = []
-        self.board_limit = self.board_size * self.board_size
+        # Битборды: по одному биту на клетку, индекс бита = row * board_size + col
+        self.bits_x = self.bits_o = 0
+        self.last_idx = None
+        # Таблица транспозиций для поиска хода бота
+        self._tt = {}
+        self.winning_coords = frozenset()
         self.winner_count = 0
-        self.change_bot_play = 'player'
         self.is_play_bot = None if self.mode is None else self.mode
         self.position = None
 
+    def _cells(self):
+        """
+        Плоская строка символов 'X', 'O' и ' ' длиной board_limit,
+        индекс символа = row * board_size + col. Строится по битбордам.
+        """
+        bits_x, bits_o = self.bits_x, self.bits_o
+        return ''.join('X' if bits_x >> i & 1 else 'O' if bits_o >> i & 1 else ' '
+                       for i in range(self.board_limit))
+
+    @property
+    def board(self):
+        """
+        Представление поля в виде списка строк из символов 'X', 'O' и ' '.
+        Строится по битбордам на лету и нужно только для внешнего просмотра.
+        """
+        cells = self._cells()
+        n = self.board_size
+        return [list(cells[r * n:(r + 1) * n]) for r in range(n)]
+
     def get_colored_symbol(self, symbol, r=None, c=None):
         """
         Управляет цветом и форматированием игровых символов.
@@ -95,83 +213,105 @@ class TicTacToe:
            только победную линию, а остальные символы окрашивает в тускло-серый,
            акцентируя внимание на результате матча.
         3. Обеспечивает центрирование символа внутри ячейки согласно CELL_WIDTH.
+        Все варианты отрисовки заготовлены в __init__, метод лишь выбирает нужный.
         """
+        dim = bool(self.winning_coords) and (r, c) not in self.winning_coords
         if symbol == 'X':
-            color = Fore.RED
-        elif symbol == 'O':
-            color = Fore.GREEN
-        else:
-            return f"{' ':^{self.CELL_WIDTH}}"
-        if self.winning_coords:
-            if (r, c) not in self.winning_coords:
-                return f'{Fore.LIGHTBLACK_EX}{symbol:^{self.CELL_WIDTH}}{Style.RESET_ALL}'
-        return f'{color}{symbol:^{self.CELL_WIDTH}}{Style.RESET_ALL}'
+            return self._cell_dim_x if dim else self._cell_x
+        if symbol == 'O':
+            return self._cell_dim_o if dim else self._cell_o
+        return self._cell_empty
 
     def display_board(self):
         """
         Визуализация игрового поля в консоли.
-        Использует CELL_WIDTH для выравнивания и 'hybrid_sep' для создания
+        Использует заранее построенные '_empty_line' и '_hybrid_sep' для создания
         эффекта сетки с нижним подчеркиванием ячеек.
+        Кадр собирается целиком и выводится одной записью в stdout.
         """
-        # 1. Пустая линия для создания высоты ячейки
-        empty_line = '|'.join(
-            [f"{' ':{self.CELL_WIDTH}}" for _ in range(self.board_size)])
-        # 2. Линия-разделитель (гибридная идея с нижним подчеркиванием)
-        # Используется нижнее подчеркивание только ТАМ, где проходят границы
-        # между клетками
-        hybrid_sep = '|'.join(
-            [f"{'_' * self.CELL_WIDTH}" for _ in range(self.board_size)])
-        for i, row in enumerate(self.board):
-            print(empty_line)
-            formatted_row = [
-                f'{self.get_colored_symbol(cell, i, j)}' for j, cell in enumerate(row)]
-            print('|'.join(formatted_row))
-            if i < self.board_size - 1:
-                print(hybrid_sep)
-            else:
-                print(empty_line)
+        cells = self._cells()
+        n = self.board_size
+        out = []
+        for i in range(n):
+            row = cells[i * n:(i + 1) * n]
+            out.append(self._empty_line)
+            out.append('|'.join(
+                [self.get_colored_symbol(cell, i, j) for j, cell in enumerate(row)]))
+            out.append(self._hybrid_sep if i < self.board_size - 1 else self._empty_line)
+        sys.stdout.write('\n'.join(out) + '\n')
 
     def _is_draw(self):
-        return all(' ' not in row for row in self.board)
+        # Поле заполнено, когда число ходов достигло числа клеток;
+        # победа проверяется в play() раньше ничьей
+        return self.winner_count >= self.board_limit
 
     def _is_winner(self):
         """
         Проверка наличия выигрышной комбинации на поле.
 
-        Метод анализирует все заранее сгенерированные линии (строки, столбцы, диагонали).
-        Если находится линия, полностью заполненная символом текущего игрока,
-        координаты этой линии сохраняются в self.winning_coords для последующей
+        Победу может принести только последний ход, поэтому битборд текущего
+        игрока сравнивается лишь с масками линий (строка, столбец, диагонали),
+        проходящих через клетку self.last_idx. Если линия заполнена целиком,
+        её координаты сохраняются в self.winning_coords для последующей
         подсветки при отрисовке поля.
         """
-        for combo in self.win_combinations:
-            may_win = [self.board[r][c] for r, c in combo]
-            if may_win.count('X') == self.board_size or may_win.count(
-                    'O') == self.board_size:
-                self.winning_coords = combo
+        if self.last_idx is None:
+            return False
+        bits = self.bits_x if self.current_player == 'X' else self.bits_o
+        for mask, coords_set in self.lines_through[self.last_idx]:
+            if bits & mask == mask:
+                self.winning_coords = coords_set
                 return True
         return False
 
     def _is_cell_occupied(self, row, col):
-        return self.board[row][col] != ' '
+        return bool((self.bits_x | self.bits_o) >> (row * self.board_size + col) & 1)
 
-    def _try_make_move(self, position):
-        position = int(position)
+    def _validate_position(self, position):
+        """
+        Проверяет номер ячейки (1 - board_limit) и возвращает индекс клетки с нуля.
+        Проверка и преобразование ввода выполняются одним разбором.
+        """
+        try:
+            position = int(position)
+        except ValueError:
+            raise InvalidInputError(position) from None
         if not (1 <= position <= self.board_limit):
             raise InvalidPositionError(position, self.board_limit)
-        row = (position - 1) // self.board_size
-        col = (position - 1) % self.board_size
-        if self._is_cell_occupied(row, col):
-            raise CellOccupiedError(position, self.board[row][col])
+        idx = position - 1
+        if (self.bits_x | self.bits_o) >> idx & 1:
+            raise CellOccupiedError(position, 'X' if self.bits_x >> idx & 1 else 'O')
+        return idx
+
+    def _place(self, idx):
+        """Ставит символ текущего игрока в свободную клетку idx."""
         self.winner_count += 1
-        self.board[row][col] = self.current_player
+        self.last_idx = idx
+        if self.current_player == 'X':
+            self.bits_x |= 1 << idx
+        else:
+            self.bits_o |= 1 << idx
 
-    def _validate_move(self, pos_str):
-        if not pos_str.isdigit():
-            raise InvalidInputError(pos_str)
+    def _try_make_move(self, position):
+        self._place(self._validate_position(position))
+
+    def _apply_move_and_check(self, idx):
+        """
+        Шаг игрового движка без ввода-вывода: ставит символ текущего игрока
+        в свободную клетку idx и возвращает 'win', 'draw' или 'continue'.
+        Если партия продолжается, очередь переходит к сопернику.
+        """
+        self._place(idx)
+        # До хода 2n-1 ни у одного игрока нет n символов, и линию можно не проверять
+        if self.winner_count >= self._min_win_moves and self._is_winner():
+            return 'win'
+        if self._is_draw():
+            return 'draw'
+        self._switch_player()
+        return 'continue'
 
     def show_current_player(self):
-        return (f'{Fore.RED}{'X'}{Style.RESET_ALL}' if self.current_player == 'X'
-                else f'{Fore.GREEN}{'O'}{Style.RESET_ALL}')
+        return self._player_label[self.current_player]
 
     def _is_continue_game(self, result: str):
         if result == 'win':
@@ -183,20 +323,20 @@ class TicTacToe:
         ask_replay = input('Хотите сыграть ещё раз? [Y\\n] ')
         if ask_replay.lower() in ['да', 'д', 'y', 'yes']:
             self.reset()
-            self.reset_player = True
             return True
         print('Хорошего дня', '\U0001F917')
         return False
 
     def _save_game_history(self, result: str = None):
         mode = 'Бот' if self.is_play_bot is True else 'PVP'
-        now = datetime.now().strftime("%d.%m.%Y %H:%M")
+        # Формат ДД.ММ.ГГГГ ЧЧ:ММ собирается из полей без разбора strftime
+        n = datetime.now()
+        now = f'{n.day:02d}.{n.month:02d}.{n.year} {n.hour:02d}:{n.minute:02d}'
         # строка лога
-        log_entry = (f"[{now}] Режим: {mode} | Поле: {self.board_size}x{self.board_size} | "
-                     f"Количество ходов: {self.winner_count} | Итог: {result}\n")
+        log_entry = (f"[{now}] Режим: {mode} | {self._log_board}"
+                     f"{self.winner_count} | Итог: {result}\n")
         try:
-            with open('tic_tac_toe_history.txt', 'a', encoding='utf-8') as file:
-                file.write(log_entry)
+            _get_history_file().write(log_entry)
         except OSError as e:
             print(f"Произошла системная ошибка при работе с файлом: {e}")
 
@@ -211,103 +351,204 @@ class TicTacToe:
         self.is_play_bot = (True if ask_play_with_bot in
                             ['y', 'yes', 'д', 'да', 'Y'] else False)
 
-    def pvp_mode(self):
-        self.display_board()
-        print(f'Ходит игрок: {self.show_current_player()}')
-        self.pos_str = input(f'Введите ячейку 1 - {self.board_limit}: ')
+    def _make_move(self, position):
+        """
+        Выполняет ход текущего игрока по номеру ячейки (1 - board_limit).
+        Возвращает 'win', 'draw' или 'continue', как _apply_move_and_check.
+        """
+        return self._apply_move_and_check(self._validate_position(position))
 
-    def bot_mode(self):
-        # Логика игры против бота
-        if self.change_bot_play == 'player':
+    def _human_turn(self, prompt):
+        """
+        Ход человека: запрос повторяется, пока не будет введён корректный ход.
+        Возвращает результат _make_move или 'stop' при пустом вводе.
+        """
+        while True:
             self.display_board()
-            print(f'Ваш ход {self.show_current_player()}')
-            self.pos_str = input(
-                f'Введите ячейку 1 - {self.board_limit}: ')
-        elif self.change_bot_play == 'bot':
-            move_bot = self._get_ai_move()
-            self.pos_str = str(
-                move_bot[0] * self.board_size + move_bot[1] + 1)
-            print(f'Бот сделал ход, теперь ваша очередь')
-
-    def _is_stop_game(self):
-        if not self.pos_str:
-            return True
+            print(f'{prompt} {self.show_current_player()}')
+            pos_str = input(f'Введите ячейку 1 - {self.board_limit}: ').strip()
+            if not pos_str:
+                return 'stop'
+            try:
+                return self._make_move(pos_str)
+            except TicTacToeError as e:
+                print(e)
+
+    def _bot_turn(self):
+        idx = self._ai_move_idx(self.bits_o, self.bits_x)
+        print('Бот сделал ход, теперь ваша очередь')
+        return self._apply_move_and_check(idx)
+
+    def _finish_game(self, result):
+        """Завершение партии. Возвращает True, если игроки хотят сыграть снова."""
+        if result == 'stop':
+            print('Вы досрочно завершили игру')
+            return False
+        self.display_board()
+        return self._is_continue_game(result)
+
+    def _play_pvp(self):
+        while True:
+            result = self._human_turn('Ходит игрок:')
+            if result != 'continue':
+                return self._finish_game(result)
+
+    def _play_bot(self):
+        # Ходы человека и бота просто чередуются, без флага очередности
+        while True:
+            result = self._human_turn('Ваш ход')
+            if result == 'continue':
+                result = self._bot_turn()
+            if result != 'continue':
+                return self._finish_game(result)
 
     def play(self):
         """
         Основной игровой цикл.
-        Управляет логикой ходов, переключением между игроком и ботом,
-        а также обрабатывает прерывание игры пользователем (через ENTER).
+        Режим выбирается один раз перед партией, после чего управление
+        передается специализированному циклу (_play_pvp или _play_bot).
+        Прерывание игры пользователем (через ENTER) завершает цикл.
         """
         while True:
-            try:
-                if self.is_play_bot is None:
-                    self._mode_selection()
-
-                if self.winner_count == 0:
-                    self._message_mode(self.is_play_bot)
-
-                self.bot_mode() if self.is_play_bot else self.pvp_mode()
-                if self._is_stop_game():
-                    print('Вы досрочно завершили игру')
-                    return
-                self._validate_move(self.pos_str)
-                self._try_make_move(self.pos_str)
-                if self._is_winner():
-                    self.display_board()
-                    if not self._is_continue_game('win'):
-                        return
-                elif self._is_draw():
-                    self.display_board()
-                    if not self._is_continue_game('draw'):
-                        return
-                self._switch_player()
-
-            except TicTacToeError as e:
-                print(e)
+            if self.is_play_bot is None:
+                self._mode_selection()
+            self._message_mode(self.is_play_bot)
+            if not (self._play_bot() if self.is_play_bot else self._play_pvp()):
+                return
 
     def _switch_player(self):
-        if self.is_play_bot is not None and self.reset_player is False:
-            self.current_player = 'O' if self.current_player == 'X' else 'X'
-        if self.is_play_bot and self.reset_player is False:
-            self.change_bot_play = 'player' if self.change_bot_play == 'bot' else 'bot'
-        if self.reset_player:
-            self.reset_player = False
+        self.current_player = 'O' if self.current_player == 'X' else 'X'
+
+    def _evaluate(self, bits_own, bits_opp):
+        """
+        Оценка позиции для стороны bits_own: каждая линия без символов соперника
+        приносит 4 ** (число своих символов), линия без своих символов отнимает
+        столько же в пользу соперника. Заблокированные линии не учитываются.
+        """
+        score = 0
+        for mask in self.line_masks:
+            own = bits_own & mask
+            opp = bits_opp & mask
+            if not opp:
+                if own:
+                    score += 1 << 2 * own.bit_count()
+            elif not own:
+                score -= 1 << 2 * opp.bit_count()
+        return score
+
+    def _negamax(self, bits_own, bits_opp, depth, alpha, beta):
+        """
+        Альфа-бета поиск в форме негамакса на битбордах.
+
+        bits_own — сторона, которая ходит. Возвращает пару (оценка, индекс хода).
+        Результаты сохраняются в таблице транспозиций self._tt по ключу
+        (bits_own, bits_opp) вместе с глубиной, типом оценки и лучшим ходом;
+        ход из таблицы перебирается первым, что ускоряет отсечения.
+        """
+        key = (bits_own, bits_opp)
+        entry = self._tt.get(key)
+        tt_idx = None
+        if entry is not None:
+            tt_depth, flag, value, tt_idx = entry
+            if tt_depth >= depth and (flag == _TT_EXACT
+                                      or flag == _TT_LOWER and value >= beta
+                                      or flag == _TT_UPPER and value <= alpha):
+                return value, tt_idx
+
+        empty = ~(bits_own | bits_opp) & self._full_mask
+        if not empty:
+            return 0, None
+        if depth == 0:
+            return self._evaluate(bits_own, bits_opp), None
+
+        moves = []
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            moves.append(bit.bit_length() - 1)
+        if tt_idx is not None:
+            moves.remove(tt_idx)
+            moves.insert(0, tt_idx)
+
+        # Пока у стороны меньше board_size - 1 символов, ход не может дать победу
+        can_win = bits_own.bit_count() >= self.board_size - 1
+        alpha_orig = alpha
+        best_value, best_idx = None, None
+        for idx in moves:
+            new_own = bits_own | 1 << idx
+            if can_win and any(new_own & mask == mask
+                               for mask in self._lines_through_masks[idx]):
+                # Чем раньше победа, тем больше оставшаяся глубина и оценка
+                value = _WIN_SCORE + depth
+            else:
+                value = -self._negamax(bits_opp, new_own, depth - 1, -beta, -alpha)[0]
+            if best_value is None or value > best_value:
+                best_value, best_idx = value, idx
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = _TT_UPPER
+        elif best_value >= beta:
+            flag = _TT_LOWER
+        else:
+            flag = _TT_EXACT
+        self._tt[key] = (depth, flag, best_value, best_idx)
+        return best_value, best_idx
 
     def _get_ai_move(self):
         """
         Алгоритм принятия решения искусственным интеллектом (ботом).
 
-        Логика бота строится на системе приоритетов:
-        1. Атака: Если до победы остался один ход, бот ставит символ в пустую ячейку линии.
-        2. Защита: Если игрок может победить следующим ходом, бот блокирует эту возможность.
-        3. Центр: Если центр поля свободен, бот занимает его (стратегическое преимущество).
-        4. Случайный ход: Если приоритетные варианты отсутствуют, выбирается любая свободная ячейка.
-        """
-        def find_empty_in_line(symbol, target_count):
-            for combo in self.win_combinations:
-                line_values = [self.board[r][c] for r, c in combo]
-                if line_values.count(
-                        symbol) == target_count and line_values.count(' ') == 1:
-
-                    empty_idx = line_values.index(' ')
-                    return combo[empty_idx]
-            return None
-        move = find_empty_in_line('O', self.board_size - 1)
-        if move:
-            return move
-
-        move = find_empty_in_line('X', self.board_size - 1)
-        if move:
-            return move
-
-        center = self.board_size // 2
-        if self.board[center][center] == ' ':
-            return (center, center)
-
-        empty_cells = [(r, c) for r in range(self.board_size)
-                       for c in range(self.board_size) if self.board[r][c] == ' ']
-        return choice(empty_cells) if empty_cells else None
+        На поле 3x3 бот играет оптимально: ход берется из полного перебора _solve_3x3.
+        На остальных полях выполняется альфа-бета поиск (_negamax) на несколько
+        ходов вперед с оценкой открытых линий. Глубина подбирается так, чтобы
+        число перебираемых позиций не превышало _SEARCH_BUDGET: в начале партии
+        на больших полях бот видит свой ход и ответ соперника, к концу — глубже.
+        Немедленная победа и блокировка угрозы соперника находятся поиском сами.
+        """
+        idx = self._ai_move_idx(self.bits_o, self.bits_x)
+        return None if idx is None else divmod(idx, self.board_size)
+
+    def _ai_move_idx(self, bits_own, bits_opp):
+        """Индекс клетки, выбранной ботом за сторону bits_own, или None."""
+        if self.board_size == 3:
+            return _solve_3x3(bits_own, bits_opp)[1]
+        empty_count = self.board_limit - (bits_own | bits_opp).bit_count()
+        depth, nodes = 1, empty_count
+        while depth < empty_count and nodes * (empty_count - depth) <= _SEARCH_BUDGET:
+            nodes *= empty_count - depth
+            depth += 1
+        return self._negamax(bits_own, bits_opp, depth,
+                             -_WIN_SCORE * 2, _WIN_SCORE * 2)[1]
+
+    def _bot_policy(self):
+        """Стратегия для self_play: ход бота за текущего игрока."""
+        if self.current_player == 'X':
+            return self._ai_move_idx(self.bits_x, self.bits_o)
+        return self._ai_move_idx(self.bits_o, self.bits_x)
+
+    def self_play(self, n_games, policy_x=None, policy_o=None):
+        """
+        Пакетный прогон партий без ввода-вывода (без print, input и записи в лог).
+
+        policy_x и policy_o — функции, которые получают объект игры и возвращают
+        индекс свободной клетки (row * board_size + col); None означает ход бота.
+        Возвращает словарь с количеством побед 'X', 'O' и ничьих 'draw'.
+        Каждая партия начинается с reset().
+        """
+        policies = {'X': policy_x or TicTacToe._bot_policy,
+                    'O': policy_o or TicTacToe._bot_policy}
+        results = {'X': 0, 'O': 0, 'draw': 0}
+        for _ in range(n_games):
+            self.reset()
+            while (status := self._apply_move_and_check(
+                    policies[self.current_player](self))) == 'continue':
+                pass
+            results[self.current_player if status == 'win' else 'draw'] += 1
+        self.reset()
+        return results
 
 
 if __name__ == "__main__":